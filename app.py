@@ -1,14 +1,35 @@
+import os
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timezone
-from fetch_shows import update_all, get_events, purge_non_july_events, init_db
-from crawl_agemdaconcertmetal import crawl_concertsmetal
-from fetch_seatgeek import fetch_seatgeek
+from fetch_shows import purge_non_july_events, init_db, search_events
+from sources import run_source, label
+from snapshot import write_snapshot, load_events_df, SNAPSHOT_ARROW
+
+CARDS_PER_PAGE = 50
+TABLE_COLUMNS = ["Artist", "Genre", "Venue", "City", "State", "Date", "URL", "Source", "Image"]
 
 # --- Ensure database exists ---
 init_db()
 purge_non_july_events()
 
+
+def finish_ingest():
+    """Post-fetch steps: drop non-July rows, geocode new cities, rewrite the snapshot."""
+    from geo import geocode_events
+    purge_non_july_events()
+    geocode_events()
+    write_snapshot()
+
+
+@st.cache_resource
+def route_index(snapshot_mtime):
+    """Spatial index, rebuilt only when a new snapshot is written."""
+    from geo import geocode_events, build_index
+    geocode_events()  # no-op once every city is cached
+    return build_index()
+
+
 st.set_page_config(page_title="USA Band Tracker", layout="wide")
 st.title("🎸 USA Road Trip Gig Tracker")
 
@@ -20,32 +41,32 @@ with col1:
         st.info("Fetching shows from all sources... please wait ⏳")
         total = 0
         try:
-            n_tm = update_all()
+            n_tm = run_source("ticketmaster")
         except Exception as exc:
-            st.error(f"Ticketmaster fetch failed: {exc}")
+            st.error(f"{label('ticketmaster')} fetch failed: {exc}")
             n_tm = 0
 
         try:
-            n_cm = crawl_concertsmetal()
+            n_cm = run_source("concertsmetal")
         except Exception as exc:
-            st.error(f"Concerts-Metal fetch failed: {exc}")
+            st.error(f"{label('concertsmetal')} fetch failed: {exc}")
             n_cm = 0
 
         try:
-            n_sg = fetch_seatgeek(test_mode=False)
+            n_sg = run_source("seatgeek")
         except Exception as exc:
-            st.error(f"SeatGeek fetch failed: {exc}")
+            st.error(f"{label('seatgeek')} fetch failed: {exc}")
             n_sg = 0
 
         try:
-            purge_non_july_events()
+            finish_ingest()
         except Exception as exc:
-            st.warning(f"Warning while purging non-July events: {exc}")
+            st.warning(f"Warning while finishing ingest: {exc}")
 
         total = (n_tm or 0) + (n_cm or 0) + (n_sg or 0)
         st.success(
-            f"✅ Added {total} new shows!\n\n"
-            f"(Ticketmaster: {n_tm}, Concerts-Metal: {n_cm}, SeatGeek: {n_sg})\n"
+            f"✅ Added or updated {total} shows!\n\n"
+            f"({label('ticketmaster')}: {n_tm}, {label('concertsmetal')}: {n_cm}, {label('seatgeek')}: {n_sg})\n"
             f"(Last updated {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M UTC')})"
         )
 
@@ -60,90 +81,105 @@ if debug_mode:
     st.sidebar.write("🧪 Individual fetch tests")
 
     if st.sidebar.button("🔄 Fetch Ticketmaster"):
-        st.info("Fetching Ticketmaster shows...")
+        st.info(f"Fetching {label('ticketmaster')} shows...")
         try:
-            n = update_all()
-            purge_non_july_events()
-            st.success(f"✅ Added {n} new Ticketmaster shows.")
+            n = run_source("ticketmaster")
+            finish_ingest()
+            st.success(f"✅ Added or updated {n} {label('ticketmaster')} shows.")
         except Exception as exc:
-            st.error(f"Ticketmaster fetch failed: {exc}")
+            st.error(f"{label('ticketmaster')} fetch failed: {exc}")
 
     if st.sidebar.button("🤘 Fetch Concerts-Metal (July only)"):
-        st.info("Fetching Concerts-Metal shows...")
+        st.info(f"Fetching {label('concertsmetal')} shows...")
         try:
-            n = crawl_concertsmetal()
-            purge_non_july_events()
-            st.success(f"✅ Added {n} new Concerts-Metal shows.")
+            n = run_source("concertsmetal")
+            finish_ingest()
+            st.success(f"✅ Added or updated {n} {label('concertsmetal')} shows.")
         except Exception as exc:
-            st.error(f"Concerts-Metal fetch failed: {exc}")
+            st.error(f"{label('concertsmetal')} fetch failed: {exc}")
 
     if st.sidebar.button("🎟️ Fetch SeatGeek (July only)"):
-        st.info("Fetching SeatGeek shows...")
+        st.info(f"Fetching {label('seatgeek')} shows...")
         try:
-            n = fetch_seatgeek(test_mode=False)
-            purge_non_july_events()
-            st.success(f"✅ Added {n} new SeatGeek shows.")
+            n = run_source("seatgeek")
+            finish_ingest()
+            st.success(f"✅ Added or updated {n} {label('seatgeek')} shows.")
         except Exception as exc:
-            st.error(f"SeatGeek fetch failed: {exc}")
+            st.error(f"{label('seatgeek')} fetch failed: {exc}")
+
+# Sidebar: road-trip route query
+st.sidebar.title("🛣️ Road Trip Route")
+itinerary_text = st.sidebar.text_area(
+    "One stop per line: YYYY-MM-DD, City, ST",
+    placeholder="2026-07-03, Denver, CO\n2026-07-04, Salt Lake City, UT",
+)
+route_miles = st.sidebar.slider("Max miles from route", 10, 300, 75, step=5)
+
+if itinerary_text.strip():
+    from geo import route_events
+    itinerary = []
+    for line in itinerary_text.strip().splitlines():
+        parts = [p.strip() for p in line.split(",")]
+        if len(parts) == 3:
+            itinerary.append((parts[0], parts[1], parts[2]))
+        else:
+            st.sidebar.warning(f"Skipping malformed stop: {line}")
+
+    if itinerary:
+        mtime = os.path.getmtime(SNAPSHOT_ARROW) if os.path.exists(SNAPSHOT_ARROW) else 0
+        hits, unresolved = route_events(route_index(mtime), itinerary, route_miles)
+        for day, city, state in unresolved:
+            st.sidebar.warning(f"Unknown stop on {day}: {city}, {state} — not in the city gazetteer")
+        st.markdown(f"### 🛣️ Shows within {route_miles} miles of your route")
+        for day, _, _ in itinerary:
+            rows = hits.get(day, [])
+            with st.expander(f"🗓️ {day} — {len(rows)} show(s)"):
+                for _, artist, venue, city, state, _, _, _ in rows:
+                    st.markdown(f"**{artist}** — {venue} ({city}, {state})")
 
 # --- Load and display data ---
-data = get_events()
+df = load_events_df()
 
-if not data:
+if df.empty:
     st.info("No events stored yet — click 'Fetch latest shows' above.")
 else:
-    df = pd.DataFrame(
-        data,
-        columns=["Artist", "Genre", "Venue", "City", "State", "Date", "URL", "Source", "Image"]
-    )
-
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-    df = df[df["Date"].dt.month == 7]
-    df["URL_raw"] = df["URL"]
-    df["URL"] = df["URL"].apply(lambda x: f"[Link]({x})" if x else "")
+    # snapshot already holds parsed July dates, categorical columns and genre colors
 
     # --- Filters ---
+    search_text = st.text_input("🔎 Search artist, venue or genre", placeholder="e.g. motley, red rocks, doom")
     col1, col2 = st.columns(2)
     with col1:
-        state_filter = st.multiselect("Filter by State", sorted(df["State"].unique()))
+        state_filter = st.multiselect("Filter by State", sorted(df["State"].cat.categories))
     with col2:
         genre_filter = st.multiselect(
             "Filter by Genre (OR)",
-            sorted(set(g.strip() for g in ", ".join(df["Genre"].dropna()).split("/") if g))
+            sorted(set(g.strip() for g in ", ".join(df["Genre"].cat.categories).split("/") if g))
         )
 
-    filtered_df = df.copy()
-    if state_filter:
-        filtered_df = filtered_df[filtered_df["State"].isin(state_filter)]
-    if genre_filter:
-        filtered_df = filtered_df[filtered_df["Genre"].apply(
-            lambda x: any(g.lower() in x.lower() for g in genre_filter)
-        )]
-
-    # --- Color helper ---
-    def color_by_genre(val):
-        if not val:
-            return ""
-        val = str(val).lower()
-        if "metal" in val:
-            return "background-color: #444; color: white;"
-        if "punk" in val:
-            return "background-color: #c00; color: white;"
-        if "goth" in val or "dark" in val or "wave" in val:
-            return "background-color: #505050; color: white;"
-        if "industrial" in val or "ebm" in val or "electro" in val:
-            return "background-color: #333366; color: white;"
-        return ""
-
-    # --- Duplicate grouping helper ---
-    def find_duplicates(df, artist, city, date):
-        """Return possible duplicates (same artist, city, date, different source)."""
-        mask = (
-            (df["Artist"].str.lower() == artist.lower())
-            & (df["City"].str.lower() == city.lower())
-            & (df["Date"] == date)
-        )
-        return df[mask]
+    # build one boolean mask and index once; with no filters the frame is used as-is
+    filtered_df = df
+    wanted = []
+    if state_filter or genre_filter:
+        mask = pd.Series(True, index=df.index)
+        if state_filter:
+            mask &= df["State"].isin(state_filter)
+        if genre_filter:
+            # substring test runs per distinct genre, then maps back through the codes
+            genres = df["Genre"].cat.categories
+            wanted = [c for c in genres if any(g.lower() in c.lower() for g in genre_filter)]
+            mask &= df["Genre"].isin(wanted)
+        filtered_df = df[mask]
+    # ranked hits come from the FTS5 index, not a scan of the frame, with
+    # state/genre filters applied in SQL before the LIMIT; None means the box
+    # holds no searchable words (empty, "!!!"), which counts as no search
+    hits, capped = search_events(search_text, states=state_filter, genres=wanted)
+    searching = hits is not None
+    if searching:
+        if capped:
+            st.caption(f"Showing the top {len(hits)} matches — refine the search to see others.")
+        rank = {eid: i for i, eid in enumerate(hits)}
+        filtered_df = filtered_df[filtered_df["ID"].isin(rank)]
+        filtered_df = filtered_df.iloc[filtered_df["ID"].map(rank).argsort()]
 
     show_table = st.toggle("📊 Show table view", value=False)
     show_duplicates = st.toggle("🔍 Show possible duplicates?", value=True)
@@ -154,15 +190,32 @@ else:
         if filtered_df.empty:
             st.warning("No shows match your filters.")
         else:
-            grouped = filtered_df.groupby("Artist")
+            grouped = filtered_df.groupby("Artist", sort=False)
+            # alphabetical, or FTS rank order when searching
+            artists = list(pd.unique(filtered_df["Artist"]))
+            if not searching:
+                artists.sort()
+            n_pages = max(1, -(-len(artists) // CARDS_PER_PAGE))
+            page = st.number_input(f"Page (of {n_pages})", 1, n_pages, 1) if n_pages > 1 else 1
+            page_artists = artists[(page - 1) * CARDS_PER_PAGE: page * CARDS_PER_PAGE]
+
+            # same artist + city + date from several sources, keyed once for the page
+            if show_duplicates:
+                page_df = filtered_df[filtered_df["Artist"].isin(page_artists)]
+                dupe_keys = (
+                    page_df["Artist"].str.lower() + "|"
+                    + page_df["City"].astype(str).str.lower() + "|"
+                    + page_df["Date"].dt.strftime("%Y-%m-%d")
+                )
+                dupe_groups = page_df.groupby(dupe_keys).groups
 
-            for artist, group in grouped:
-                group = group.sort_values(by="Date")
+            for artist in page_artists:
+                group = grouped.get_group(artist).sort_values(by="Date")
                 main = group.iloc[0]
                 others = group.iloc[1:]
 
                 image_url = main.get("Image", None)
-                url = main.get("URL_raw", "")
+                url = main.get("URL", "")
                 date_str = main["Date"].strftime("%Y-%m-%d") if pd.notnull(main["Date"]) else "Unknown"
 
                 st.markdown(f"""
@@ -197,11 +250,12 @@ else:
                         for _, row in others.iterrows():
                             d = row["Date"].strftime("%Y-%m-%d") if pd.notnull(row["Date"]) else "Unknown"
                             st.markdown(f"**{d}** — {row['Venue']} ({row['City']}, {row['State']})  \n"
-                                        f"[🎟 Open link]({row['URL_raw']})")
+                                        f"[🎟 Open link]({row['URL']})")
 
                 # --- Possible duplicates (same artist, same city, same date) ---
                 if show_duplicates:
-                    dupes = find_duplicates(filtered_df, main["Artist"], main["City"], main["Date"])
+                    key = f"{main['Artist'].lower()}|{str(main['City']).lower()}|{date_str}"
+                    dupes = page_df.loc[dupe_groups.get(key, [])]
                     dupes = dupes[dupes["Source"] != main["Source"]]
                     if len(dupes) > 0:
                         with st.expander(f"🔍 Possible duplicates ({len(dupes)})"):
@@ -221,7 +275,7 @@ else:
                                         <b>{dup['Artist']}</b> — {dup['Venue']}<br>
                                         🗓️ {d}<br>
                                         🌐 {dup['Source']}<br>
-                                        <a href="{dup['URL_raw']}" target="_blank" rel="noopener noreferrer"
+                                        <a href="{dup['URL']}" target="_blank" rel="noopener noreferrer"
                                            style="display:inline-block;margin-top:4px;padding:4px 8px;
                                            border-radius:6px;background:#3b82f6;color:white;
                                            text-decoration:none;font-size:0.85rem;">
@@ -237,8 +291,11 @@ else:
         if filtered_df.empty:
             st.warning("No shows match your filters.")
         else:
+            # Styler.apply hands over the precomputed color column in one call
+            colors = filtered_df["GenreColor"].astype(str).to_numpy()
             st.dataframe(
-                filtered_df.style.map(color_by_genre, subset=["Genre"]),
+                filtered_df[TABLE_COLUMNS].style.apply(lambda _: colors, subset=["Genre"]),
+                column_config={"URL": st.column_config.LinkColumn("URL", display_text="Link")},
                 use_container_width=True,
                 hide_index=True
             )
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Startup-time benchmark for the app's import path
+Compares the read-only view (storage + UI only) with eagerly importing every
+fetcher, each in a fresh interpreter so module caches don't skew the numbers.
+"""
+
+import statistics
+import subprocess
+import sys
+
+RUNS = 5
+
+READ_ONLY = ["streamlit", "pandas", "fetch_shows", "snapshot", "sources"]
+ALL_SOURCES = READ_ONLY + ["crawl_agemdaconcertmetal", "fetch_seatgeek"]
+HEAVY = ["aiohttp", "bs4", "nest_asyncio", "requests"]
+
+SCRIPT = """
+import sys, time
+t0 = time.perf_counter()
+for m in {modules!r}:
+    __import__(m)
+elapsed = time.perf_counter() - t0
+loaded = [m for m in {heavy!r} if m in sys.modules]
+print(elapsed, ",".join(loaded))
+"""
+
+
+def time_imports(modules):
+    """Return (median seconds, heavy modules loaded) over RUNS fresh interpreters."""
+    timings, loaded = [], ""
+    code = SCRIPT.format(modules=modules, heavy=HEAVY)
+    for _ in range(RUNS):
+        out = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout.split()
+        timings.append(float(out[0]))
+        loaded = out[1] if len(out) > 1 else ""
+    return statistics.median(timings), loaded
+
+
+if __name__ == "__main__":
+    for name, modules in [("read-only view", READ_ONLY), ("all sources", ALL_SOURCES)]:
+        secs, loaded = time_imports(modules)
+        print(f"⏱️ {name:<15} {secs * 1000:8.1f} ms   heavy modules: {loaded or 'none'}")
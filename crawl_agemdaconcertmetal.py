@@ -158,19 +158,38 @@ async def crawl_concertsmetal_async():
             state_events = await parse_state_page(session, st)
             all_events.extend(state_events)
 
-        # Fetch genre + image for each event
-        tasks, mapping = [], []
+        # Genre + image: cached artists skip the gig page entirely, and the
+        # rest are fetched once per artist rather than once per tour date
+        cached = {} if TEST_MODE else fetch_shows.get_artist_genres(e["artist"] for e in all_events)
+        # other sources' labels only replace the MusicGroup genre when they are specific
+        cached = {
+            k: hit for k, hit in cached.items()
+            if hit[2] == "Concerts-Metal" or fetch_shows.is_specific_genre(hit[0])
+        }
+        tasks, mapping, fetched_keys = [], [], set()
         for e in all_events:
+            key = fetch_shows.artist_key(e["artist"])
+            if key in cached or key in fetched_keys:
+                continue
+            fetched_keys.add(key)
             tasks.append(fetch_details(session, e["url"]))  # ✅ lowercase
-            mapping.append(e)
+            mapping.append((key, e["artist"]))
 
         details = await asyncio.gather(*tasks, return_exceptions=True)
+        fetched = {k: d for (k, _), d in zip(mapping, details) if isinstance(d, dict)}
+        learned = [
+            (artist, d["Genre"], d["Image"])
+            for (_, artist), d in zip(mapping, details) if isinstance(d, dict)
+        ]
+        print(f"🗂️ {len(cached)} artists from genre cache, {len(tasks)} detail pages fetched")
 
         events = []
-        for e, d in zip(mapping, details):
-            if isinstance(d, dict):
-                e["genre"] = d["Genre"]
-                e["image"] = d["Image"]
+        for e in all_events:
+            key = fetch_shows.artist_key(e["artist"])
+            if key in cached:
+                e["genre"], e["image"] = cached[key][0], cached[key][1] or ""
+            elif key in fetched:
+                e["genre"], e["image"] = fetched[key]["Genre"], fetched[key]["Image"]
             else:
                 e["genre"], e["image"] = "Unknown", ""
             events.append(e)
@@ -182,8 +201,10 @@ async def crawl_concertsmetal_async():
             print("\n🧪 TEST MODE — Preview table:\n")
             print(df.to_string(index=False))
         else:
-            for e in events:
-                fetch_shows.save_event(e)
+            fetch_shows.remember_artist_genres(learned, "Concerts-Metal")
+            added, updated = fetch_shows.save_events(events)
+            print(f"✅ Added {added} new and updated {updated} changed Concerts-Metal shows.")
+            return added + updated
 
     return len(events)
 
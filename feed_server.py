@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""
+Read-only JSON / ICS feed server
+Serves the event snapshot as paginated JSON and as an iCalendar feed for
+calendar sync and other consumers. Responses (body, gzip body, ETag) are
+rendered once per snapshot version, so a request is a cache lookup.
+"""
+
+import asyncio
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from aiohttp import web
+import snapshot
+
+# ---- CONFIG ----
+HOST = os.getenv("FEED_HOST", "0.0.0.0")
+PORT = int(os.getenv("FEED_PORT", "8080"))
+POLL_SECONDS = 10       # how often to check for a newer snapshot
+PER_PAGE = 100
+MAX_PER_PAGE = 500
+MAX_CACHED = 512        # rendered filter/page combinations kept per snapshot
+PRECOMPUTE_PAGES = 20   # unfiltered JSON pages rendered as soon as a snapshot lands
+# ----------------
+
+DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+# =============================
+# RENDERING
+# =============================
+def _ics_escape(text):
+    return (
+        str(text or "")
+        .replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+    )
+
+
+def _ics_fold(line):
+    """Fold a content line at 75 octets as RFC 5545 requires."""
+    raw = line.encode("utf-8")
+    if len(raw) <= 75:
+        return line
+    parts, start = [], 0
+    while start < len(raw):
+        end = min(start + (75 if not parts else 74), len(raw))
+        # don't split a multi-byte character
+        while end < len(raw) and (raw[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(raw[start:end].decode("utf-8"))
+        start = end
+    return "\r\n ".join(parts)
+
+
+def render_json(events, page, per_page):
+    pages = max(1, -(-len(events) // per_page))
+    body = {
+        "total": len(events),
+        "page": page,
+        "per_page": per_page,
+        "pages": pages,
+        "events": events[(page - 1) * per_page: page * per_page],
+    }
+    return json.dumps(body, ensure_ascii=False).encode("utf-8")
+
+
+def render_ics(events, stamp):
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//USA Band Tracker//Gig Feed//EN",
+        "CALSCALE:GREGORIAN",
+        "X-WR-CALNAME:USA Road Trip Gigs",
+    ]
+    for e in events:
+        start = datetime.date.fromisoformat(e["date"])
+        location = f"{e['venue']}, {e['city']}, {e['state']}"
+        description = f"{e['genre']} — via {e['source']}"
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:{e['id']}@usa-band-tracker",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART;VALUE=DATE:{start.strftime('%Y%m%d')}",
+            f"DTEND;VALUE=DATE:{(start + datetime.timedelta(days=1)).strftime('%Y%m%d')}",
+            f"SUMMARY:{_ics_escape(e['artist'])}",
+            f"LOCATION:{_ics_escape(location)}",
+            f"DESCRIPTION:{_ics_escape(description)}",
+        ]
+        if e["url"]:
+            lines.append(f"URL:{e['url']}")
+        lines.append("END:VEVENT")
+    lines.append("END:VCALENDAR")
+    return ("\r\n".join(_ics_fold(line) for line in lines) + "\r\n").encode("utf-8")
+
+
+# =============================
+# SNAPSHOT-BACKED CACHE
+# =============================
+def snapshot_version():
+    """mtime of the current snapshot file, or None if none has been written yet."""
+    path = snapshot.SNAPSHOT_ARROW
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+
+class FeedCache:
+    """Events from one snapshot version plus every response rendered from them."""
+
+    def __init__(self, version, events):
+        self.version = version
+        self.events = events
+        stamp = datetime.datetime.fromtimestamp(version or 0, datetime.timezone.utc)
+        self.stamp = stamp.strftime("%Y%m%dT%H%M%SZ")
+        self.responses = OrderedDict()
+        # misses render on executor threads while the loop serves hits
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_snapshot(cls):
+        """Load the current snapshot and pre-render its common feeds (blocking)."""
+        # read-only: ingests write the snapshot, the server only maps it
+        version = snapshot_version()
+        df = snapshot.load_snapshot()
+        events = []
+        if df is not None:
+            df = df.dropna(subset=["Date"]).sort_values("Date")
+            for row in df.itertuples(index=False):
+                events.append({
+                    "id": row.ID,
+                    "artist": row.Artist,
+                    "genre": str(row.Genre),
+                    "venue": str(row.Venue),
+                    "city": str(row.City),
+                    "state": str(row.State),
+                    "date": row.Date.strftime("%Y-%m-%d"),
+                    "url": row.URL or "",
+                    "source": str(row.Source),
+                    "image": row.Image or "",
+                })
+        cache = cls(version, events)
+        cache.precompute()
+        print(f"📡 Feed cache loaded {len(events)} events.")
+        return cache
+
+    def precompute(self):
+        """Render the unfiltered feeds and one per state up front."""
+        pages = max(1, -(-len(self.events) // PER_PAGE))
+        for page in range(1, min(pages, PRECOMPUTE_PAGES) + 1):
+            self.get("json", (), "", "", "", page, PER_PAGE)
+        self.get("ics", (), "", "", "", 1, PER_PAGE)
+        for state in sorted({e["state"] for e in self.events}):
+            self.get("json", (state,), "", "", "", 1, PER_PAGE)
+            self.get("ics", (state,), "", "", "", 1, PER_PAGE)
+
+    def filter(self, states, genre, date_from, date_to):
+        genre = genre.lower()
+        return [
+            e for e in self.events
+            if (not states or e["state"] in states)
+            and (not genre or genre in e["genre"].lower())
+            and (not date_from or e["date"] >= date_from)
+            and (not date_to or e["date"] <= date_to)
+        ]
+
+    @staticmethod
+    def key(kind, states, genre, date_from, date_to, page, per_page):
+        return (kind, states, genre.lower(), date_from, date_to) + ((page, per_page) if kind == "json" else ())
+
+    def lookup(self, key):
+        """Cached (body, gzip body, etag) for a key, or None."""
+        with self.lock:
+            hit = self.responses.get(key)
+            if hit is not None:
+                self.responses.move_to_end(key)
+            return hit
+
+    def get(self, kind, states, genre, date_from, date_to, page, per_page):
+        """Return (body, gzip body, etag) for a query, rendering it on first use (blocking)."""
+        key = self.key(kind, states, genre, date_from, date_to, page, per_page)
+        hit = self.lookup(key)
+        if hit is not None:
+            return hit
+
+        events = self.filter(states, genre, date_from, date_to)
+        body = render_json(events, page, per_page) if kind == "json" else render_ics(events, self.stamp)
+        hit = (body, gzip.compress(body, 6), '"' + hashlib.sha1(body).hexdigest()[:20] + '"')
+        with self.lock:
+            self.responses[key] = hit
+            if len(self.responses) > MAX_CACHED:
+                self.responses.popitem(last=False)
+        return hit
+
+
+# =============================
+# HTTP HANDLERS
+# =============================
+def _query(request):
+    """Parse and validate the shared filter parameters."""
+    q = request.query
+    states = tuple(sorted({s.strip().upper() for s in q.get("state", "").split(",") if s.strip()}))
+    date_from, date_to = q.get("from", ""), q.get("to", "")
+    for d in (date_from, date_to):
+        if d and not DATE_RE.match(d):
+            raise web.HTTPBadRequest(text="Dates must be YYYY-MM-DD")
+    try:
+        page = max(1, int(q.get("page", 1)))
+        per_page = min(MAX_PER_PAGE, max(1, int(q.get("per_page", PER_PAGE))))
+    except ValueError:
+        raise web.HTTPBadRequest(text="page and per_page must be integers")
+    return states, q.get("genre", "").strip(), date_from, date_to, page, per_page
+
+
+def _etag_matches(header, etag):
+    """If-None-Match check: comma-separated list, weak comparison, or "*"."""
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*" or (tag[2:] if tag.startswith("W/") else tag) == etag:
+            return True
+    return False
+
+
+async def _respond(request, kind, content_type):
+    cache = request.app["feeds"]["cache"]
+    query = _query(request)
+    hit = cache.lookup(cache.key(kind, *query))
+    if hit is None:
+        # a new filter combination: render it without stalling other clients
+        hit = await asyncio.get_running_loop().run_in_executor(None, cache.get, kind, *query)
+    body, gz_body, etag = hit
+    headers = {"Cache-Control": "public, max-age=60", "Vary": "Accept-Encoding"}
+
+    # the gzip variant is a different representation, so it gets its own ETag
+    if "gzip" in request.headers.get("Accept-Encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        body, etag = gz_body, etag[:-1] + '-gz"'
+    headers["ETag"] = etag
+
+    if _etag_matches(request.headers.get("If-None-Match", ""), etag):
+        headers.pop("Content-Encoding", None)
+        return web.Response(status=304, headers=headers)
+    return web.Response(body=body, content_type=content_type, charset="utf-8", headers=headers)
+
+
+async def events_json(request):
+    return await _respond(request, "json", "application/json")
+
+
+async def events_ics(request):
+    return await _respond(request, "ics", "text/calendar")
+
+
+async def watch_snapshot(app):
+    """Swap in a freshly rendered cache whenever an ingest writes a new snapshot."""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(POLL_SECONDS)
+        if snapshot_version() == app["feeds"]["cache"].version:
+            continue
+        try:
+            # render off the event loop, then swap in one assignment; on failure
+            # the last good cache keeps serving
+            app["feeds"]["cache"] = await loop.run_in_executor(None, FeedCache.from_snapshot)
+        except Exception as exc:
+            print(f"⚠️ Feed reload failed: {exc}")
+
+
+async def start_watcher(app):
+    app["watcher"] = asyncio.create_task(watch_snapshot(app))
+
+
+async def stop_watcher(app):
+    app["watcher"].cancel()
+
+
+def make_app():
+    app = web.Application()
+    # a mutable holder, since the app's own mapping is frozen once it starts
+    app["feeds"] = {"cache": FeedCache.from_snapshot()}
+    app.router.add_get("/events.json", events_json)
+    app.router.add_get("/events.ics", events_ics)
+    app.on_startup.append(start_watcher)
+    app.on_cleanup.append(stop_watcher)
+    return app
+
+
+if __name__ == "__main__":
+    web.run_app(make_app(), host=HOST, port=PORT)
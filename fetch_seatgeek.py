@@ -8,7 +8,10 @@ import os
 import re
 import time
 import requests
-from fetch_shows import save_event, already_seen, init_db, STATES
+from fetch_shows import (
+    save_events, init_db, STATES, KEYWORDS,
+    artist_key, get_artist_genres, remember_artist_genres,
+)
 
 # ----------------------------------------------------------------------
 # CONFIGURATION
@@ -83,13 +86,38 @@ def match_genre(event):
     return None
 
 
+GENERIC_GENRES = ["rock", "alternative", "indie"]
+SPECIFIC_TERMS = [t for t in TARGET_GENRES if t not in GENERIC_GENRES] + KEYWORDS
+
+
+def cached_genre(event, cache):
+    """Specific genre already known for one of the event's performers (from any source)."""
+    for p in event.get("performers", []):
+        hit = cache.get(artist_key(p.get("name")))
+        # a cached generic label ("Rock / Pop") would be no better than our own guess
+        if hit and "undefined" not in hit[0].lower() and any(t in hit[0].lower() for t in SPECIFIC_TERMS):
+            return hit[0]
+    return None
+
+
+def performer_genres(event):
+    """(name, genre, image) for performers SeatGeek tags with a specific target genre."""
+    found = []
+    for p in event.get("performers", []):
+        for g in p.get("genres") or []:
+            name = g.get("name", "").lower()
+            if name in TARGET_GENRES and name not in GENERIC_GENRES:
+                found.append((p.get("name"), g.get("name", "").title(), p.get("image")))
+                break
+    return found
+
+
 def fetch_seatgeek(test_mode=False):
     """
     Fetch SeatGeek concerts for target states within date range.
     test_mode=True prints preview and summary instead of saving to DB.
     """
     init_db()
-    total_added = 0
     collected = []
     seen_keys = set()  # prevent duplicates (artist + city + date)
 
@@ -116,8 +144,20 @@ def fetch_seatgeek(test_mode=False):
             if not events:
                 break
 
+            # one cache lookup per page; SeatGeek's own specific performer genre
+            # wins, then the cache, then regex classification
+            cache = get_artist_genres(
+                p.get("name") for ev in events for p in ev.get("performers", [])
+            )
+            learned = []
+
             for ev in events:
-                genre = match_genre(ev)
+                specific = performer_genres(ev)
+                if specific:
+                    genre = specific[0][1]
+                    learned.extend(specific)
+                else:
+                    genre = cached_genre(ev, cache) or match_genre(ev)
                 if not genre:
                     continue
 
@@ -140,8 +180,6 @@ def fetch_seatgeek(test_mode=False):
                 # -------------------------
 
                 eid = f"sg_{ev.get('id')}"
-                if already_seen(eid) and not test_mode:
-                    continue
 
                 collected.append({
                     "id": eid,
@@ -156,6 +194,9 @@ def fetch_seatgeek(test_mode=False):
                     "source": "SeatGeek",
                 })
 
+            if not test_mode:
+                remember_artist_genres(learned, "SeatGeek")
+
             if not data.get("meta", {}).get("has_next"):
                 break
 
@@ -175,12 +216,10 @@ def fetch_seatgeek(test_mode=False):
         print(df.head(25).to_string(index=False))
         return df
 
-    for ev in collected:
-        save_event(ev)
-        total_added += 1
+    total_added, total_updated = save_events(collected)
 
-    print(f"✅ Added {total_added} new SeatGeek shows (unique).")
-    return total_added
+    print(f"✅ Added {total_added} new and updated {total_updated} changed SeatGeek shows (unique).")
+    return total_added + total_updated
 
 
 if __name__ == "__main__":
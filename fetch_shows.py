@@ -1,5 +1,8 @@
 import os
-import requests
+import re
+import json
+import hashlib
+import unicodedata
 import sqlite3
 import datetime
 import time
@@ -25,6 +28,14 @@ KEYWORDS = [
 START_DATE = "2026-07-01T00:00:00Z"
 END_DATE = "2026-07-31T23:59:59Z"
 
+# how long a cached artist → genre entry is trusted before re-classifying
+ARTIST_GENRE_TTL_DAYS = 30
+
+# fields that make up an event's content hash (everything except id/bookkeeping)
+HASH_FIELDS = ["artist", "venue", "city", "state", "genre", "image", "date", "url", "source"]
+# a re-fetch that failed to find these shouldn't wipe a value we already have
+STICKY_FIELDS = {"genre": ("", "Unknown"), "image": ("",)}
+
 # ─────────────────────────── DB INIT ────────────────────────────
 
 def ensure_genre_column():
@@ -49,6 +60,24 @@ def ensure_image_column():
         print("🆕 Added 'image' column to events table")
     conn.close()
 
+def ensure_hash_column():
+    conn = sqlite3.connect(DB)
+    cur = conn.cursor()
+    cur.execute("PRAGMA table_info(events)")
+    cols = [r[1] for r in cur.fetchall()]
+    if "content_hash" not in cols:
+        cur.execute("ALTER TABLE events ADD COLUMN content_hash TEXT")
+        # backfill rows stored before hashing existed (once, with the column)
+        cur.execute(f"SELECT id, {', '.join(HASH_FIELDS)} FROM events")
+        rows = cur.fetchall()
+        cur.executemany(
+            "UPDATE events SET content_hash = ? WHERE id = ?",
+            [(event_hash(dict(zip(HASH_FIELDS, r[1:]))), r[0]) for r in rows],
+        )
+        conn.commit()
+        print("🆕 Added 'content_hash' column to events table")
+    conn.close()
+
 def init_db():
     conn = sqlite3.connect(DB)
     conn.execute("""
@@ -63,43 +92,220 @@ def init_db():
         date TEXT,
         url TEXT,
         source TEXT,
-        inserted_at TEXT
+        inserted_at TEXT,
+        content_hash TEXT
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS venue_geo(
+        city TEXT,
+        state TEXT,
+        lat REAL,
+        lon REAL,
+        resolved_at TEXT,
+        PRIMARY KEY (city, state)
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS event_history(
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_id TEXT,
+        changed_at TEXT,
+        old_hash TEXT,
+        new_hash TEXT,
+        changes TEXT
+    )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_event_history_event ON event_history(event_id)")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS artist_genres(
+        artist_key TEXT PRIMARY KEY,
+        artist TEXT,
+        genre TEXT,
+        image TEXT,
+        source TEXT,
+        updated_at TEXT
     )
     """)
     conn.commit()
     conn.close()
     ensure_genre_column()
     ensure_image_column()
+    ensure_search_index()
+    ensure_hash_column()
 
-def already_seen(event_id):
+def ensure_search_index():
+    """FTS5 index over artist/venue/genre, kept in sync with `events` by triggers."""
     conn = sqlite3.connect(DB)
     cur = conn.cursor()
-    cur.execute("SELECT 1 FROM events WHERE id = ?", (event_id,))
-    found = cur.fetchone() is not None
+    cur.execute("SELECT name, sql FROM sqlite_master WHERE name IN ('events_fts', 'events_fts_au')")
+    found = dict(cur.fetchall())
+    if "events_fts" in found and "UPDATE OF" in (found.get("events_fts_au") or ""):
+        # already up to date; don't touch the schema on the read-only path
+        conn.close()
+        return
+
+    cur.executescript("""
+    CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+        artist, venue, genre,
+        content='events', content_rowid='rowid',
+        tokenize="unicode61 remove_diacritics 2",
+        prefix='2 3'
+    );
+    CREATE TRIGGER IF NOT EXISTS events_fts_ai AFTER INSERT ON events BEGIN
+        INSERT INTO events_fts(rowid, artist, venue, genre)
+        VALUES (new.rowid, new.artist, new.venue, new.genre);
+    END;
+    CREATE TRIGGER IF NOT EXISTS events_fts_ad AFTER DELETE ON events BEGIN
+        INSERT INTO events_fts(events_fts, rowid, artist, venue, genre)
+        VALUES ('delete', old.rowid, old.artist, old.venue, old.genre);
+    END;
+    -- older versions fired on every UPDATE; only artist/venue/genre matter
+    DROP TRIGGER IF EXISTS events_fts_au;
+    CREATE TRIGGER events_fts_au AFTER UPDATE OF artist, venue, genre ON events BEGIN
+        INSERT INTO events_fts(events_fts, rowid, artist, venue, genre)
+        VALUES ('delete', old.rowid, old.artist, old.venue, old.genre);
+        INSERT INTO events_fts(rowid, artist, venue, genre)
+        VALUES (new.rowid, new.artist, new.venue, new.genre);
+    END;
+    """)
+    if "events_fts" not in found:
+        # index rows that were stored before the FTS table existed
+        cur.execute("INSERT INTO events_fts(events_fts) VALUES ('rebuild')")
+        print("🆕 Built full-text search index")
+    conn.commit()
+    conn.close()
+
+def event_hash(e):
+    """Stable hash over the event's content fields."""
+    payload = json.dumps([e.get(f) or "" for f in HASH_FIELDS], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+def save_events(events):
+    """
+    Insert new events and update changed ones, in one transaction.
+    Rows whose content hash is unchanged are not written; every update is
+    recorded in `event_history`. Returns (added, updated).
+    """
+    conn = sqlite3.connect(DB)
+    cur = conn.cursor()
+    now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    added = updated = 0
+
+    for e in events:
+        e = {**e, "genre": e.get("genre", "Unknown"), "image": e.get("image", None)}
+        cur.execute(
+            f"SELECT content_hash, {', '.join(HASH_FIELDS)} FROM events WHERE id = ?", (e["id"],)
+        )
+        row = cur.fetchone()
+
+        if row is None:
+            cur.execute(
+                """INSERT INTO events
+                   (id, artist, venue, city, state, genre, image, date, url, source, inserted_at, content_hash)
+                   VALUES (?,?,?,?,?,?,?,?,?,?,?,?)""",
+                (
+                    e["id"], e["artist"], e["venue"], e["city"], e["state"],
+                    e["genre"], e["image"], e["date"], e["url"], e["source"],
+                    now, event_hash(e),
+                ),
+            )
+            added += 1
+            continue
+
+        old = dict(zip(HASH_FIELDS, row[1:]))
+        for field, empty in STICKY_FIELDS.items():
+            if (e.get(field) or "") in empty and (old.get(field) or "") not in empty:
+                e[field] = old[field]
+        new_hash = event_hash(e)
+        if new_hash == row[0]:
+            continue
+
+        changes = {f: [old[f], e.get(f)] for f in HASH_FIELDS if (old[f] or "") != (e.get(f) or "")}
+        # SET only changed columns: the FTS trigger (UPDATE OF artist, venue,
+        # genre) fires on any listed column, even if its value is the same
+        cur.execute(
+            f"UPDATE events SET {''.join(f + ' = ?, ' for f in changes)}content_hash = ? WHERE id = ?",
+            [e.get(f) for f in changes] + [new_hash, e["id"]],
+        )
+        cur.execute(
+            "INSERT INTO event_history (event_id, changed_at, old_hash, new_hash, changes) VALUES (?,?,?,?,?)",
+            (e["id"], now, row[0], new_hash, json.dumps(changes, ensure_ascii=False)),
+        )
+        updated += 1
+
+    conn.commit()
+    conn.close()
+    return added, updated
+
+# ─────────────────────────── ARTIST GENRE CACHE ────────────────────────────
+
+def artist_key(name):
+    """Normalize an artist name for cache lookups (case, accents, punctuation)."""
+    name = unicodedata.normalize("NFKD", name or "")
+    name = "".join(c for c in name if not unicodedata.combining(c)).casefold()
+    return " ".join(re.findall(r"\w+", name))
+
+def is_specific_genre(genre):
+    """True for labels that name one of our KEYWORDS genres (not "Rock / Pop", "Undefined")."""
+    genre = (genre or "").lower()
+    return "undefined" not in genre and any(k in genre for k in KEYWORDS)
+
+def get_artist_genres(names):
+    """Return {artist_key: (genre, image, source)} for names with a fresh cache entry."""
+    keys = list({artist_key(n) for n in names if artist_key(n)})
+    if not keys:
+        return {}
+    cutoff = (
+        datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=ARTIST_GENRE_TTL_DAYS)
+    ).isoformat()
+    conn = sqlite3.connect(DB)
+    cur = conn.cursor()
+    found = {}
+    # stay under SQLite's bound-parameter limit
+    for i in range(0, len(keys), 500):
+        chunk = keys[i:i + 500]
+        cur.execute(
+            f"""SELECT artist_key, genre, image, source FROM artist_genres
+                WHERE artist_key IN ({','.join('?' * len(chunk))}) AND updated_at >= ?""",
+            chunk + [cutoff],
+        )
+        found.update({k: (g, img, src) for k, g, img, src in cur.fetchall()})
     conn.close()
     return found
 
-def save_event(e):
+def remember_artist_genres(entries, source):
+    """Cache (artist, genre, image) tuples; unknown genres are ignored."""
+    now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    rows = [
+        (artist_key(artist), artist, genre, image or None, source, now)
+        for artist, genre, image in entries
+        if artist_key(artist) and genre and genre != "Unknown"
+    ]
+    if not rows:
+        return 0
     conn = sqlite3.connect(DB)
-    conn.execute(
-        """INSERT OR IGNORE INTO events
-           (id, artist, venue, city, state, genre, image, date, url, source, inserted_at)
-           VALUES (?,?,?,?,?,?,?,?,?,?,?)""",
-        (
-            e["id"], e["artist"], e["venue"], e["city"], e["state"],
-            e.get("genre", "Unknown"), e.get("image", None),
-            e["date"], e["url"], e["source"],
-            datetime.datetime.now(datetime.timezone.utc).isoformat(),
-        ),
+    conn.executemany(
+        """INSERT INTO artist_genres (artist_key, artist, genre, image, source, updated_at)
+           VALUES (?,?,?,?,?,?)
+           ON CONFLICT(artist_key) DO UPDATE SET
+               artist = excluded.artist,
+               genre = excluded.genre,
+               image = COALESCE(excluded.image, artist_genres.image),
+               source = excluded.source,
+               updated_at = excluded.updated_at""",
+        rows,
     )
     conn.commit()
     conn.close()
+    return len(rows)
 
 # ─────────────────────────── API CALL ────────────────────────────
 
 def fetch_ticketmaster():
     """Fetch all music events once per state, then locally filter by genre/subgenre against KEYWORDS."""
-    new_events = 0
+    import requests  # only needed when fetching, keeps the read-only app import light
+    new_events = updated_events = 0
     base_url = "https://app.ticketmaster.com/discovery/v2/events.json"
 
     for st in STATES:
@@ -121,6 +327,7 @@ def fetch_ticketmaster():
 
             data = r.json()
             events = data.get("_embedded", {}).get("events", [])
+            batch, known_artists = [], []
             print(f"📀 {len(events)} total events fetched for {st}")
 
             for ev in events:
@@ -151,20 +358,39 @@ def fetch_ticketmaster():
                 img_url = images[0]["url"] if images else None
                 eid = "tm_" + ev.get("id", "")
 
-                if not already_seen(eid):
-                    save_event({
-                        "id": eid,
-                        "artist": ev.get("name", ""),
-                        "venue": venue,
-                        "city": city,
-                        "state": state,
-                        "genre": f"{genre} / {subgenre}",
-                        "image": img_url,
-                        "date": date,
-                        "url": url,
-                        "source": "Ticketmaster",
-                    })
-                    new_events += 1
+                # performers carry their own classification; fall back to the event's
+                for att in ev.get("_embedded", {}).get("attractions", []) or []:
+                    a_genre, a_sub = genre, subgenre
+                    if att.get("classifications"):
+                        ac = att["classifications"][0]
+                        a_genre = (ac.get("genre", {}) or {}).get("name", "") or genre
+                        a_sub = (ac.get("subGenre", {}) or {}).get("name", "") or subgenre
+                    # only cache labels that would actually help another source
+                    if not is_specific_genre(f"{a_genre} / {a_sub}"):
+                        continue
+                    att_images = att.get("images", [])
+                    known_artists.append((
+                        att.get("name", ""), f"{a_genre} / {a_sub}",
+                        att_images[0]["url"] if att_images else None,
+                    ))
+
+                batch.append({
+                    "id": eid,
+                    "artist": ev.get("name", ""),
+                    "venue": venue,
+                    "city": city,
+                    "state": state,
+                    "genre": f"{genre} / {subgenre}",
+                    "image": img_url,
+                    "date": date,
+                    "url": url,
+                    "source": "Ticketmaster",
+                })
+
+            added, updated = save_events(batch)
+            remember_artist_genres(known_artists, "Ticketmaster")
+            new_events += added
+            updated_events += updated
 
         except Exception as e:
             print(f"❌ Exception fetching {st}: {e}")
@@ -172,8 +398,8 @@ def fetch_ticketmaster():
         # slight delay to avoid rate limiting
         time.sleep(0.5)
 
-    print(f"✅ Added {new_events} new events after filtering by genre/subgenre.")
-    return new_events
+    print(f"✅ Added {new_events} new and updated {updated_events} changed events after filtering by genre/subgenre.")
+    return new_events + updated_events
 
 
 # ─────────────────────────── RETRIEVAL ────────────────────────────
@@ -182,12 +408,48 @@ def get_events():
     conn = sqlite3.connect(DB)
     cur = conn.cursor()
     cur.execute(
-        "SELECT artist, genre, venue, city, state, date, url, source, image FROM events ORDER BY date ASC"
+        "SELECT artist, genre, venue, city, state, date, url, source, image, id FROM events ORDER BY date ASC"
     )
     rows = cur.fetchall()
     conn.close()
     return rows
 
+def _fts_query(text):
+    """Turn free text into an FTS5 query: every word must match as a prefix."""
+    words = re.findall(r"\w+", text, flags=re.UNICODE)
+    return " ".join('"' + w.replace('"', '') + '"*' for w in words)
+
+def search_events(text, states=None, genres=None, limit=500):
+    """
+    Return (ids, capped): event ids matching `text` in artist/venue/genre,
+    best match first, restricted to `states` / exact `genres` when given.
+    Filters apply before the LIMIT; `capped` is True if more hits were cut off.
+    ids is None when `text` has no searchable words (e.g. "!!!"), meaning "no search".
+    """
+    query = _fts_query(text)
+    if not query:
+        return None, False
+    sql = """SELECT e.id FROM events_fts f
+             JOIN events e ON e.rowid = f.rowid
+             WHERE events_fts MATCH ?"""
+    params = [query]
+    if states:
+        sql += f" AND e.state IN ({','.join('?' * len(states))})"
+        params += list(states)
+    if genres:
+        # the snapshot shows NULL genres as "Unknown", so match them the same way
+        sql += f" AND COALESCE(e.genre, 'Unknown') IN ({','.join('?' * len(genres))})"
+        params += list(genres)
+    sql += " ORDER BY bm25(events_fts, 10.0, 3.0, 1.0) LIMIT ?"
+    params.append(limit + 1)
+
+    conn = sqlite3.connect(DB)
+    cur = conn.cursor()
+    cur.execute(sql, params)
+    ids = [r[0] for r in cur.fetchall()]
+    conn.close()
+    return ids[:limit], len(ids) > limit
+
 def update_all():
     init_db()
     added = fetch_ticketmaster()
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Offline venue geocoder + spatial event index
+Resolves each (city, state) against the bundled gazetteer once, caches the
+coordinates in the `venue_geo` table, and answers radius / along-route
+queries through a KD-tree instead of scanning every row.
+"""
+
+import csv
+import datetime
+import math
+import os
+import re
+import sqlite3
+import numpy as np
+from scipy.spatial import cKDTree
+import fetch_shows
+
+# ---- CONFIG ----
+GAZETTEER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gazetteer_us_cities.csv")
+EARTH_RADIUS_MI = 3958.8
+# ----------------
+
+_gazetteer = None
+
+
+# =============================
+# GEOCODING
+# =============================
+def normalize_city(city):
+    """Lowercase, drop '(…)' suffixes and punctuation, unify 'Saint'/'St.'."""
+    city = re.sub(r"\(.*?\)", "", city or "").lower()
+    city = re.sub(r"[.,']", "", city)
+    city = re.sub(r"\bsaint\b", "st", city)
+    return " ".join(city.split())
+
+
+def load_gazetteer():
+    """Return {(normalized city, state): (lat, lon)} from the bundled CSV."""
+    global _gazetteer
+    if _gazetteer is None:
+        _gazetteer = {}
+        with open(GAZETTEER, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                key = (normalize_city(row["city"]), row["state"].upper())
+                _gazetteer[key] = (float(row["lat"]), float(row["lon"]))
+    return _gazetteer
+
+
+def geocode_events():
+    """Resolve every uncached (city, state) in `events`; returns how many were resolved."""
+    gaz = load_gazetteer()
+    conn = sqlite3.connect(fetch_shows.DB)
+    cur = conn.cursor()
+    # misses are retried once the bundled gazetteer has been updated since
+    gaz_updated = datetime.datetime.fromtimestamp(
+        os.path.getmtime(GAZETTEER), datetime.timezone.utc
+    ).isoformat()
+    cur.execute("DELETE FROM venue_geo WHERE lat IS NULL AND resolved_at < ?", (gaz_updated,))
+    cur.execute("""
+        SELECT DISTINCT e.city, e.state FROM events e
+        LEFT JOIN venue_geo g ON g.city = e.city AND g.state = e.state
+        WHERE g.city IS NULL
+    """)
+    pending = cur.fetchall()
+
+    now = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    rows, resolved = [], 0
+    for city, state in pending:
+        lat, lon = gaz.get((normalize_city(city), (state or "").upper()), (None, None))
+        if lat is not None:
+            resolved += 1
+        # misses are cached as NULL too so they aren't retried until the gazetteer changes
+        rows.append((city, state, lat, lon, now))
+
+    cur.executemany(
+        "INSERT OR REPLACE INTO venue_geo (city, state, lat, lon, resolved_at) VALUES (?,?,?,?,?)",
+        rows,
+    )
+    conn.commit()
+    conn.close()
+    print(f"📍 Geocoded {resolved}/{len(pending)} new cities.")
+    return resolved
+
+
+# =============================
+# SPATIAL INDEX
+# =============================
+def _to_xyz(lat, lon):
+    """Project lat/lon (degrees) onto the unit sphere so Euclidean ≈ great-circle."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
+
+def _chord(miles):
+    """Great-circle distance in miles → chord length on the unit sphere."""
+    return 2 * math.sin(min(miles / EARTH_RADIUS_MI, math.pi) / 2)
+
+
+class EventIndex:
+    """KD-tree over geocoded events; rows are (id, artist, venue, city, state, date, lat, lon)."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.dates = np.array([r[5] for r in rows], dtype=object)
+        coords = np.array([(r[6], r[7]) for r in rows], dtype=float).reshape(-1, 2)
+        self.tree = cKDTree(_to_xyz(coords[:, 0], coords[:, 1])) if rows else None
+
+    def candidates(self, points, miles, date=None):
+        """Indices of events within `miles` of any of the given (lat, lon) points."""
+        if self.tree is None or not points:
+            return []
+        pts = np.array(points, dtype=float)
+        hits = set()
+        for idx in self.tree.query_ball_point(_to_xyz(pts[:, 0], pts[:, 1]), _chord(miles)):
+            hits.update(idx)
+        hits = sorted(hits)
+        if date is not None:
+            hits = [i for i in hits if self.dates[i] == date]
+        return hits
+
+    def near_stop(self, stop, miles, date=None):
+        """Events within `miles` of a single (lat, lon) point."""
+        return [self.rows[i] for i in self.candidates([stop], miles, date)]
+
+    def near_leg(self, a, b, miles, date=None):
+        """Events within `miles` of the great-circle segment from a to b."""
+        step = max(miles, 1.0)
+        points = _segment_points(a, b, step)
+        # a point within `miles` of the segment is within hypot(miles, step/2)
+        # of the nearest sample; query that wide, then filter by exact distance
+        radius = math.hypot(miles, step / 2) * 1.01
+        idx = self.candidates(points, radius, date)
+        if not idx:
+            return []
+        coords = np.array([(self.rows[i][6], self.rows[i][7]) for i in idx], dtype=float)
+        dist = _segment_distance_mi(_to_xyz(coords[:, 0], coords[:, 1]), a, b)
+        return [self.rows[i] for i, d in zip(idx, dist) if d <= miles]
+
+
+def build_index():
+    """Build an EventIndex from every event whose city has cached coordinates."""
+    conn = sqlite3.connect(fetch_shows.DB)
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT e.id, e.artist, e.venue, e.city, e.state, e.date, g.lat, g.lon
+        FROM events e JOIN venue_geo g ON g.city = e.city AND g.state = e.state
+        WHERE g.lat IS NOT NULL
+    """)
+    rows = cur.fetchall()
+    conn.close()
+    return EventIndex(rows)
+
+
+# =============================
+# ROUTE QUERIES
+# =============================
+def resolve_stop(city, state):
+    """Gazetteer lookup for an itinerary stop; returns (lat, lon) or None."""
+    return load_gazetteer().get((normalize_city(city), state.upper()))
+
+
+def _segment_points(a, b, step_miles):
+    """Points every `step_miles` along the great circle from a to b (inclusive)."""
+    pa, pb = _to_xyz([a[0], b[0]], [a[1], b[1]])
+    angle = math.acos(max(-1.0, min(1.0, float(np.dot(pa, pb)))))
+    if angle < 1e-9:
+        return [a]
+    n = max(1, int(math.ceil(angle * EARTH_RADIUS_MI / max(step_miles, 1e-6))))
+    points = []
+    for t in np.linspace(0.0, 1.0, n + 1):
+        # slerp between the two endpoints
+        v = (math.sin((1 - t) * angle) * pa + math.sin(t * angle) * pb) / math.sin(angle)
+        points.append((math.degrees(math.asin(max(-1.0, min(1.0, v[2])))), math.degrees(math.atan2(v[1], v[0]))))
+    return points
+
+
+def _segment_distance_mi(xyz, a, b):
+    """Great-circle distance (miles) from unit vectors `xyz` to the segment a→b."""
+    pa, pb = _to_xyz([a[0], b[0]], [a[1], b[1]])
+    to_a = np.arccos(np.clip(xyz @ pa, -1.0, 1.0))
+    to_b = np.arccos(np.clip(xyz @ pb, -1.0, 1.0))
+    dist = np.minimum(to_a, to_b)
+
+    normal = np.cross(pa, pb)
+    norm = np.linalg.norm(normal)
+    if norm > 1e-12:
+        normal /= norm
+        cross_track = np.abs(np.arcsin(np.clip(xyz @ normal, -1.0, 1.0)))
+        # the perpendicular foot lies on the segment when it sits between a and b
+        foot = xyz - np.outer(xyz @ normal, normal)
+        on_segment = (np.cross(pa, foot) @ normal >= 0) & (np.cross(foot, pb) @ normal >= 0)
+        dist = np.where(on_segment, cross_track, dist)
+    return dist * EARTH_RADIUS_MI
+
+
+def route_events(index, itinerary, miles):
+    """
+    Shows within `miles` of each day's leg of a multi-stop trip.
+    itinerary: list of (date, city, state) in travel order; the leg for a day
+    runs from the previous stop to that day's stop.
+    Returns ({date: [event rows]}, [(date, city, state) stops not in the gazetteer]).
+    """
+    results, unresolved = {}, []
+    prev = None
+    for date, city, state in itinerary:
+        stop = resolve_stop(city, state)
+        if stop is None:
+            unresolved.append((date, city, state))
+            results[date] = []
+            continue
+        if prev:
+            results[date] = index.near_leg(prev, stop, miles, date=date)
+        else:
+            results[date] = index.near_stop(stop, miles, date=date)
+        prev = stop
+    return results, unresolved
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Columnar event snapshot (Arrow IPC + Parquet)
+Written once at the end of each ingest so the app and offline analysis can
+load the cleaned, typed event table without querying SQLite.
+"""
+
+import os
+import tempfile
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+import fetch_shows
+
+# ---- CONFIG ----
+SNAPSHOT_ARROW = "events.arrow"      # uncompressed IPC file → memory-mappable
+SNAPSHOT_PARQUET = "events.parquet"  # compressed copy for offline analysis
+COLUMNS = ["Artist", "Genre", "Venue", "City", "State", "Date", "URL", "Source", "Image", "ID"]
+CATEGORICAL = ["State", "Source", "Genre", "City", "Venue"]
+# ----------------
+
+
+def genre_color(val):
+    """CSS for a genre cell in the table view (computed once per distinct genre)."""
+    if not val:
+        return ""
+    val = str(val).lower()
+    if "metal" in val:
+        return "background-color: #444; color: white;"
+    if "punk" in val:
+        return "background-color: #c00; color: white;"
+    if "goth" in val or "dark" in val or "wave" in val:
+        return "background-color: #505050; color: white;"
+    if "industrial" in val or "ebm" in val or "electro" in val:
+        return "background-color: #333366; color: white;"
+    return ""
+
+
+def build_frame(rows=None):
+    """Turn `fetch_shows.get_events()` rows into the cleaned, typed table."""
+    if rows is None:
+        rows = fetch_shows.get_events()
+    df = pd.DataFrame(rows, columns=COLUMNS)
+
+    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    df = df[df["Date"].dt.month == 7].reset_index(drop=True)
+
+    df["Genre"] = df["Genre"].fillna("Unknown")
+    df["URL"] = df["URL"].fillna("")
+    df["Image"] = df["Image"].fillna("")
+    for col in CATEGORICAL:
+        df[col] = df[col].astype("category")
+    # mapping a categorical only evaluates genre_color once per category
+    df["GenreColor"] = df["Genre"].map(genre_color).astype("category")
+    return df
+
+
+def _temp_path(target):
+    """Unique temp file next to `target`, so os.replace stays on one filesystem."""
+    fd, path = tempfile.mkstemp(
+        prefix=os.path.basename(target) + ".", suffix=".tmp",
+        dir=os.path.dirname(os.path.abspath(target)),
+    )
+    os.close(fd)
+    return path
+
+
+def write_snapshot(rows=None):
+    """Write the event table as Arrow IPC and Parquet; returns the row count."""
+    df = build_frame(rows)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    # write to unique temp files first so a reader never maps a half-written
+    # file and concurrent rebuilds (app sessions, ingest) don't collide
+    tmp_arrow = _temp_path(SNAPSHOT_ARROW)
+    try:
+        with pa.OSFile(tmp_arrow, "wb") as sink:
+            with ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_arrow, SNAPSHOT_ARROW)
+    finally:
+        if os.path.exists(tmp_arrow):
+            os.remove(tmp_arrow)
+
+    tmp_parquet = _temp_path(SNAPSHOT_PARQUET)
+    try:
+        pq.write_table(table, tmp_parquet)
+        os.replace(tmp_parquet, SNAPSHOT_PARQUET)
+    finally:
+        if os.path.exists(tmp_parquet):
+            os.remove(tmp_parquet)
+
+    print(f"📦 Wrote snapshot with {len(df)} events.")
+    return len(df)
+
+
+def load_snapshot():
+    """Memory-map the Arrow snapshot and return it as a DataFrame (None if missing)."""
+    if not os.path.exists(SNAPSHOT_ARROW):
+        return None
+    with pa.memory_map(SNAPSHOT_ARROW, "r") as source:
+        table = ipc.open_file(source).read_all()
+    return table.to_pandas()
+
+
+def is_stale():
+    """True if the snapshot is missing or the DB was written after it."""
+    if not os.path.exists(SNAPSHOT_ARROW):
+        return True
+    if not os.path.exists(fetch_shows.DB):
+        return False
+    # covers ingests that bypass the app, e.g. running a fetcher module directly
+    return os.path.getmtime(fetch_shows.DB) > os.path.getmtime(SNAPSHOT_ARROW)
+
+
+def load_events_df():
+    """Load events from the snapshot, rebuilding it from SQLite when stale."""
+    df = None if is_stale() else load_snapshot()
+    if df is None or not set(COLUMNS + ["GenreColor"]) <= set(df.columns):
+        # missing, outdated, or written by an older version with fewer columns
+        try:
+            write_snapshot()
+        except Exception as exc:
+            print(f"⚠️ Snapshot rebuild failed: {exc}")
+        df = load_snapshot()
+        if df is None or not set(COLUMNS + ["GenreColor"]) <= set(df.columns):
+            # no usable file at all: build the frame in memory for this run
+            df = build_frame()
+    return df
+
+
+if __name__ == "__main__":
+    write_snapshot()
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+Source registry with lazy loading
+Fetcher modules (aiohttp, BeautifulSoup, requests, Streamlit secrets) are only
+imported the first time a source is actually run.
+"""
+
+import importlib
+
+# name → (label, module, function, kwargs)
+SOURCES = {
+    "ticketmaster": ("Ticketmaster", "fetch_shows", "update_all", {}),
+    "concertsmetal": ("Concerts-Metal", "crawl_agemdaconcertmetal", "crawl_concertsmetal", {}),
+    "seatgeek": ("SeatGeek", "fetch_seatgeek", "fetch_seatgeek", {"test_mode": False}),
+}
+
+
+def label(name):
+    return SOURCES[name][0]
+
+
+def load_source(name):
+    """Import the fetcher module on demand and return its entry point."""
+    _, module, func, _ = SOURCES[name]
+    return getattr(importlib.import_module(module), func)
+
+
+def run_source(name):
+    """Run one registered source; returns the number of events it added or updated."""
+    kwargs = SOURCES[name][3]
+    return load_source(name)(**kwargs)